@@ -19,6 +19,9 @@ fi
 export U97__LOGLEVEL="DEBUG"
 export U97__MODS_URL_PATTERN="url-to/storage/{PID}/MODS/"  # should match server for `UM__API_ROOT_URL` envar
 export U97__POST_MODS_BINARY_PATH="/path/to/update_mods_py_binary"
+export U97__MAX_WORKERS="16"                    # optional; number of pids updated and saved concurrently
+export U97__POST_MODS_VIA_TEMPFILE="true"       # optional; "false" pipes mods to the binary via `/dev/stdin` -- not yet confirmed with the real binary
+export U97__UPDATE_MODS_VIA_LXML="false"        # optional; "true" adds the element via a full lxml parse instead of string-splicing
 
 
 ## the `UM__` envars are used by the `update_mods_py_binary` -------------
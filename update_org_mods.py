@@ -4,36 +4,59 @@ Working code to update 97 org-level items in BDR.
 - manage_update(), at bottom, is the main manager function
 """
 
-import json, logging, os, pathlib, subprocess, tempfile
+import asyncio, io, json, logging, os, pathlib, re, shutil, subprocess, tempfile, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator
 
 import httpx
 from lxml import etree
 
+try:
+    import orjson  # optional; faster tracker (de)serialization
+except ImportError:
+    orjson = None
+
 
 log = logging.getLogger( __name__ )
 
 
 ## constants --------------------------------------------------------
 MODS_URL_PATTERN = os.environ['U97__MODS_URL_PATTERN']
-POST_MODS_BINARY_PATH = os.environ['U97__POST_MODS_BINARY_PATH']
+if MODS_URL_PATTERN.count( '{PID}' ) != 1:
+    raise ValueError( f'envar U97__MODS_URL_PATTERN must contain `{{PID}}` exactly once; got ``{MODS_URL_PATTERN}``' )
+MODS_URL_PREFIX, MODS_URL_SUFFIX = MODS_URL_PATTERN.split( '{PID}' )  # split once, instead of formatting per pid
+POST_MODS_BINARY_PATH = shutil.which( os.environ['U97__POST_MODS_BINARY_PATH'] ) or os.environ['U97__POST_MODS_BINARY_PATH']  # resolved once, if it's a bare command-name on PATH
+UPDATE_MODS_VIA_LXML: bool = os.environ.get( 'U97__UPDATE_MODS_VIA_LXML', 'false' ).lower() == 'true'  # fallback, to add the element via a full xml-parse
+POST_MODS_VIA_TEMPFILE: bool = os.environ.get( 'U97__POST_MODS_VIA_TEMPFILE', 'true' ).lower() == 'true'  # 'false' pipes mods via `/dev/stdin`; not yet confirmed with the real binary
+RECORD_INFO_NOTE_MARKER = b'type="HallHoagOrgLevelRecord"'  # presence means the mods already have the org-level note
+RECORD_INFO_SNIPPET = (  # spliced into the mods as-is; must match create_record_info_element()
+    b'  <mods:recordInfo>\n'
+    b'    <mods:recordInfoNote type="HallHoagOrgLevelRecord">Organization Record</mods:recordInfoNote>\n'
+    b'  </mods:recordInfo>\n' )
+RECORD_INFO_START_TAG_PATTERN = re.compile( rb'<mods:recordInfo[\s/>]' )  # matches `<mods:recordInfo>`, with attributes, or self-closing; not `<mods:recordInfoNote`
+RECORD_INFO_NOTE_SNIPPET = (  # spliced into an existing <mods:recordInfo>, when there is one
+    b'  <mods:recordInfoNote type="HallHoagOrgLevelRecord">Organization Record</mods:recordInfoNote>\n'
+    b'  ' )
+TRACKER_FLUSH_INTERVAL = 10  # tracker is kept in memory, and saved to file every this-many processed pids (and at the end)
+FETCH_CONCURRENCY = 20  # max number of simultaneous mods-requests to the server
+FETCH_ATTEMPTS = 4  # mods-requests are retried on network errors and these statuses
+RETRYABLE_STATUS_CODES = { 500, 502, 503, 504 }
+MAX_WORKERS = int( os.environ.get('U97__MAX_WORKERS', '16') )  # pids are updated and saved concurrently; work is I/O-bound
 
 
 ## helper functions -------------------------------------------------
 ## (manager function at bottom of file)
 
 
-def load_pids( pid_full_fpath: pathlib.Path ) -> list:
+def iter_pids( pid_full_fpath: pathlib.Path ) -> Iterator[str]:
     """
-    Load pids from file.
+    Yields pids from file, one at a time, skipping blank lines.
     """
-    pids = []
     with open( pid_full_fpath, 'r' ) as f:
         for line in f:
             line = line.strip()
             if line:
-                pids.append( line )
-    log.debug( f'pids, ```{pids}```' )
-    return pids
+                yield line
 
 
 def create_tracker( pid_full_fpath: pathlib.Path ) -> pathlib.Path:
@@ -43,22 +66,20 @@ def create_tracker( pid_full_fpath: pathlib.Path ) -> pathlib.Path:
     Returns tracker filepath.
     """
     tracker_full_fpath = pid_full_fpath.parent.joinpath( 'tracker.json' )
-    # if tracker_full_fpath.exists():
-    if tracker_full_fpath.exists() and tracker_full_fpath.stat().st_size > 0:  # latter condition handles empty file
-        pass
-    else:
+    if not tracker_full_fpath.exists():
         with open( tracker_full_fpath, 'w' ) as f:
             f.write( '{}' )
     return tracker_full_fpath
 
 
-def create_record_info_element() -> etree.Element:  # type:ignore
+def create_record_info_element() -> bytes:
     """
-    Creates and returns a pre-built <mods:recordInfo> element, like this:
+    Creates and returns a pre-built, serialized <mods:recordInfo> element, like this:
         <mods:recordInfo>
             <mods:recordInfoNote type="HallHoagOrgLevelRecord">Organization Record</mods:recordInfoNote>
         </mods:recordInfo>
     Builds this separately so it can be re-used for each MODS XML document.
+    Returned as immutable bytes, so no element is shared between documents (or threads).
     """
     record_info = etree.Element( '{http://www.loc.gov/mods/v3}recordInfo', attrib=None, nsmap=None )
     record_info_note = etree.SubElement(
@@ -69,58 +90,113 @@ def create_record_info_element() -> etree.Element:  # type:ignore
     )
     record_info_note.text = 'Organization Record'
     assert type(record_info) == etree._Element
-    log.debug( f' type(record_info), ``{type(record_info)}``; record_info, ``{etree.tostring(record_info).decode("utf-8")}``' )
-    return record_info
+    record_info_bytes: bytes = etree.tostring( record_info )
+    log.debug( f'record_info_bytes, ``{record_info_bytes!r}``' )
+    return record_info_bytes
 
 
-def check_if_pid_was_processed( pid: str, tracker_filepath: pathlib.Path ) -> str:
+def load_tracker( tracker_filepath: pathlib.Path ) -> dict:
     """
-    Check if pid was processed.
+    Loads tracker from file, once; it's then kept in memory for the run.
+    - an empty file (eg from an older, non-atomic write, or a `touch`) is treated as an empty tracker.
+    Called by: manage_update()
     """
-    ## load tracker -------------------------------------------------
-    with open( tracker_filepath, 'r' ) as f:
-        tracker: dict = json.loads( f.read() )
-        status = tracker.get( pid, 'not_done' )
-    log.debug( f'pid, ``{pid}``; status, ``{status}``' )
-    return status
+    data: bytes = tracker_filepath.read_bytes()
+    if not data.strip():
+        tracker: dict = {}
+    elif orjson:
+        tracker: dict = orjson.loads( data )
+    else:
+        tracker: dict = json.loads( data )
+    log.debug( f'loaded tracker with ``{len(tracker)}`` entries' )
+    return tracker
+
+
+def flush_tracker( tracker: dict, tracker_filepath: pathlib.Path ) -> None:
+    """
+    Writes the in-memory tracker to file.
+    - writes to a sibling temp-file, then renames it into place, so an interrupted write can't leave a partial tracker.
+    - caller must hold the tracker-lock, since worker-threads mutate the dict.
+    - uses orjson if it's installed; output is the same sorted, 2-space-indented json either way.
+    Called by: manage_update()
+    """
+    if orjson:
+        data: bytes = orjson.dumps( tracker, option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2 )
+    else:
+        data: bytes = json.dumps( tracker, sort_keys=True, indent=2 ).encode( 'utf-8' )
+    temp_filepath: pathlib.Path = tracker_filepath.with_suffix( '.json.tmp' )
+    temp_filepath.write_bytes( data )
+    os.replace( temp_filepath, tracker_filepath )
+    log.debug( f'flushed tracker with ``{len(tracker)}`` entries' )
+    return
 
 
-def update_tracker(pid: str, tracker_filepath: pathlib.Path, status: str) -> None:
+def update_tracker( pid: str, tracker: dict, status: str, tracker_lock: threading.Lock ) -> None:
     """
-    Loads, updates, and re-saves tracker.
+    Updates the in-memory tracker; manage_update() periodically flushes it to file.
+    - lock is needed because pids are processed in worker-threads.
     """
     assert status in ['done', 'error; see logs', 'element_already_exists']
-    ## read existing tracker data -----------------------------------
-    with open(tracker_filepath, 'r') as f:
-        tracker: dict = json.load(f)
-    ## update tracker -----------------------------------------------
-    tracker[pid] = status
-    ## write updated tracker back to file -
-    with open(tracker_filepath, 'w') as f:
-        f.write(json.dumps(tracker, sort_keys=True, indent=2))
-    log.debug(f'updated-tracker for pid, ``{pid}`` with status, ``{status}``')
+    with tracker_lock:
+        tracker[pid] = status
+    log.debug( f'updated-tracker for pid, ``{pid}`` with status, ``{status}``' )
     return
 
 
-def get_mods( pid: str ) -> str:
+async def get_mods( pid: str, client: httpx.AsyncClient, semaphore: asyncio.Semaphore ) -> bytes:
     """
-    Get mods using the constant.
+    Get mods using the url-pattern constant.
+    - uses the shared client, so connections are re-used across pids.
+    - the semaphore caps the number of concurrent requests to the server; it's not held while waiting to retry.
+    - retries, with exponential backoff, on network errors and 5xx gateway/availability responses;
+      ...raises after the last attempt, or immediately on any other error-status.
+    - returns the raw utf-8 bytes; the mods are never decoded to a string.
+    Called by: fetch_all_mods()
     """
-    mods_url: str = MODS_URL_PATTERN.format( PID=pid )
+    mods_url: str = MODS_URL_PREFIX + pid + MODS_URL_SUFFIX
     log.debug( f'mods_url, ```{mods_url}```' )
-    resp: httpx.Response = httpx.get( mods_url )
-    mods: str = resp.content.decode( 'utf-8' )  # explicitly declare utf-8
+    for attempt in range( FETCH_ATTEMPTS ):
+        try:
+            async with semaphore:
+                resp: httpx.Response = await client.get( mods_url )
+            resp.raise_for_status()
+            break
+        except ( httpx.HTTPStatusError, httpx.TransportError ) as exc:
+            retryable: bool = isinstance( exc, httpx.TransportError ) or exc.response.status_code in RETRYABLE_STATUS_CODES
+            if not retryable or attempt == FETCH_ATTEMPTS - 1:
+                raise
+            delay: float = 0.5 * 2**attempt
+            log.warning( f'problem getting mods for pid, ``{pid}``, on attempt ``{attempt + 1}``, ``{type(exc).__name__}``; retrying in ``{delay}`` seconds' )
+            await asyncio.sleep( delay )
+    mods: bytes = resp.content
     return mods
 
 
-def check_if_element_exists( pid: str, mods: str, tracker_filepath: pathlib.Path ) -> bool:
+async def fetch_all_mods( pids: list ) -> dict:
+    """
+    Fetches the mods for all pids concurrently.
+    Returns dict of pid -> mods-bytes; or pid -> exception, if that fetch failed.
+    Called by: manage_update()
     """
-    Checks if element already exists.
+    semaphore = asyncio.Semaphore( FETCH_CONCURRENCY )
+    limits = httpx.Limits( max_connections=100, max_keepalive_connections=20 )
+    async with httpx.AsyncClient( limits=limits ) as client:
+        results: list = await asyncio.gather( *[get_mods(pid, client, semaphore) for pid in pids], return_exceptions=True )
+    fetched: dict = dict( zip(pids, results) )
+    return fetched
+
+
+def check_if_element_exists( pid: str, mods: bytes, tracker: dict, tracker_lock: threading.Lock ) -> bool:
+    """
+    Checks if the org-level <mods:recordInfoNote> already exists.
     Returns boolean.
     If it does already exist, updates tracker.
+    - a plain byte-search for the note's type-attribute is sufficient; no parse is needed.
+    - the search matches the note anywhere in the document, including inside <mods:relatedItem>.
+    - a <mods:recordInfo> without the note doesn't count; update_local_mods_string() adds the note to it.
     """
-    if '<mods:recordInfo>' in mods:
-        update_tracker( pid, tracker_filepath, 'element_already_exists' )
+    if mods.find( RECORD_INFO_NOTE_MARKER ) != -1:
+        update_tracker( pid, tracker, 'element_already_exists', tracker_lock )
         return_val = True
     else:
         return_val = False
@@ -128,44 +204,101 @@ def check_if_element_exists( pid: str, mods: str, tracker_filepath: pathlib.Path
     return return_val
 
 
-def update_local_mods_string( original_mods_xml: str, PREBUILT_RECORD_INFO_ELEMENT: etree.Element ) -> str:  # type:ignore
-    """
-    Adds the pre-built <mods:recordInfo> element to the mods.
-    Returns formatted XML string.
-    """
-    ## load initial string ------------------------------------------
-    log.debug( f'original-mods, ``{original_mods_xml}``' )
-    parser = etree.XMLParser( remove_blank_text=True )
-    tree = etree.fromstring( original_mods_xml, parser=parser )
-    ## add pre-built record-info element ----------------------------
-    root: etree.Element = tree  # type:ignore
-    root.append(etree.ElementTree(PREBUILT_RECORD_INFO_ELEMENT).getroot())
-    ## convert back to string ---------------------------------------
-    new_mods_xml = etree.tostring( 
-        root, 
-        pretty_print=True,                      # type:ignore
-        xml_declaration=False,                  # type:ignore
-        encoding='UTF-8' ).decode('utf-8')      # type:ignore
-    log.debug( f'new-mods, ``{new_mods_xml}``' )
+def update_local_mods_string( original_mods_xml: bytes, PREBUILT_RECORD_INFO_BYTES: bytes ) -> bytes:
+    """
+    Adds the org-level note to the mods.
+    - by default, splices RECORD_INFO_SNIPPET in just before the closing `</mods:mods>` tag,
+      ...which avoids a full parse and re-serialization for a fixed addition.
+    - if there's exactly one <mods:recordInfo>, and no <mods:relatedItem> (which can contain its own <mods:recordInfo>),
+      ...that recordInfo must be a direct child of <mods:mods>, so RECORD_INFO_NOTE_SNIPPET is spliced in just before its closing tag.
+    - uses lxml instead if U97__UPDATE_MODS_VIA_LXML is 'true', if there's no `</mods:mods>` closing tag,
+      ...or if a <mods:recordInfo> exists but the above can't show it's a direct child with a closing tag.
+    Returns XML bytes.
+    """
+    if log.isEnabledFor( logging.DEBUG ):  # skips building large debug-messages at higher log-levels
+        log.debug( f'original-mods, ``{original_mods_xml.decode("utf-8")}``' )
+    close_tag_index: int = original_mods_xml.rfind( b'</mods:mods>' )
+    record_info_count: int = len( RECORD_INFO_START_TAG_PATTERN.findall(original_mods_xml) )
+    record_info_close_tag_index: int = original_mods_xml.rfind( b'</mods:recordInfo>' )
+    splice_into_record_info: bool = (
+        record_info_count == 1
+        and record_info_close_tag_index != -1
+        and original_mods_xml.find( b'<mods:relatedItem' ) == -1 )
+    if UPDATE_MODS_VIA_LXML or close_tag_index == -1 or ( record_info_count > 0 and not splice_into_record_info ):
+        new_mods_xml: bytes = update_local_mods_string_via_lxml( original_mods_xml, PREBUILT_RECORD_INFO_BYTES )
+    elif splice_into_record_info:
+        new_mods_xml: bytes = original_mods_xml[:record_info_close_tag_index] + RECORD_INFO_NOTE_SNIPPET + original_mods_xml[record_info_close_tag_index:]
+    else:
+        new_mods_xml: bytes = original_mods_xml[:close_tag_index] + RECORD_INFO_SNIPPET + original_mods_xml[close_tag_index:]
+    if log.isEnabledFor( logging.DEBUG ):
+        log.debug( f'new-mods, ``{new_mods_xml.decode("utf-8")}``' )
     return new_mods_xml
 
 
-def save_mods( pid: str, updated_mods: str ) -> bool:
+def update_local_mods_string_via_lxml( original_mods_xml: bytes, PREBUILT_RECORD_INFO_BYTES: bytes ) -> bytes:
+    """
+    Adds the pre-built <mods:recordInfo> element to the mods, via lxml.
+    - if <mods:mods> already has a direct-child <mods:recordInfo>, only the <mods:recordInfoNote> is added to the first one;
+      ...a <mods:recordInfo> inside <mods:relatedItem> doesn't count.
+    - uses iterparse, acting on the end-event of the <mods:mods> element, and clears the parsed tree once it's serialized.
+    - raises if <mods:mods> isn't the document root (eg it's inside a <mods:modsCollection>),
+      ...rather than posting just that one record without its wrapper.
+    - original whitespace is kept as-is; no blank-text removal or pretty-printing.
+    Returns XML bytes.
+    Called by: update_local_mods_string()
+    """
+    new_mods_xml = b''
+    source = io.BytesIO( original_mods_xml )
+    for _event, root in etree.iterparse( source, events=('end',), tag='{http://www.loc.gov/mods/v3}mods' ):
+        if root.getparent() is not None:
+            raise ValueError( f'<mods:mods> is not the document root; root is ``{root.getroottree().getroot().tag}``' )
+        ## add pre-built record-info element ------------------------
+        record_info = etree.fromstring( PREBUILT_RECORD_INFO_BYTES )  # a fresh element per document; cheaper than a deepcopy
+        existing_record_info = root.find( '{http://www.loc.gov/mods/v3}recordInfo' )
+        if existing_record_info is not None:
+            existing_record_info.append( record_info[0] )  # just the <mods:recordInfoNote>
+        else:
+            root.append( record_info )
+        ## convert back to string -----------------------------------
+        new_mods_xml = etree.tostring( 
+            root, 
+            xml_declaration=False,                  # type:ignore
+            encoding='UTF-8' )                      # type:ignore
+        ## release the parsed tree ----------------------------------
+        root.clear()
+        break  # the document root has ended
+    if not new_mods_xml:
+        raise ValueError( 'no <mods:mods> element found' )
+    return new_mods_xml
+
+
+def save_mods( pid: str, updated_mods: bytes ) -> bool:
     """
     Posts updated mods back to BDR.
-    - tempfile is used because the binary expects a filepath.
+    - the binary is an external executable taking one mods-file and one pid per call,
+      ...so it's run once per pid; the worker-threads in manage_update() overlap those runs.
+    - the binary expects a filepath, so by default a tempfile is used.
+    - if U97__POST_MODS_VIA_TEMPFILE is 'false', the mods are instead piped to the binary's stdin, and `/dev/stdin` is passed as the filepath;
+      ...that's not yet confirmed with the real binary (it'd fail if the binary stats or re-reads the file).
     - `delete=False` requires the temp-file to be deleted explicitly (not when with-scope ends),
       ...otherwise there can be issues when sending the file to subprocess.run()
     """
     success_check = False
-    with tempfile.NamedTemporaryFile( delete=False, suffix='.mods' ) as temp_file:
-        temp_file.write( updated_mods.encode('utf-8') )  
-        temp_file_path = temp_file.name  
+    temp_file_path = None
     try:
-        cmd: list = [ POST_MODS_BINARY_PATH, '--mods_filepath', temp_file_path, '--bdr_pid', pid ]
-        binary_env: dict = os.environ.copy()     
-        result: subprocess.CompletedProcess = subprocess.run( cmd, env=binary_env, capture_output=True, text=True )
-        log.debug( f'result.returncode, ``{result.returncode}``; result.stdout, ``{result.stdout}``; result.stderr, ``{result.stderr}``' )
+        if POST_MODS_VIA_TEMPFILE:
+            with tempfile.NamedTemporaryFile( delete=False, suffix='.mods' ) as temp_file:
+                temp_file.write( updated_mods )
+                temp_file_path = temp_file.name
+            mods_filepath: str = temp_file_path
+            mods_input = None
+        else:
+            mods_filepath: str = '/dev/stdin'
+            mods_input = updated_mods
+        cmd: list = [ POST_MODS_BINARY_PATH, '--mods_filepath', mods_filepath, '--bdr_pid', pid ]
+        result: subprocess.CompletedProcess = subprocess.run( cmd, input=mods_input, capture_output=True, close_fds=False )  # inherits environment; python's own fds are non-inheritable anyway
+        if log.isEnabledFor( logging.DEBUG ):
+            log.debug( f'result.returncode, ``{result.returncode}``; result.stdout, ``{result.stdout.decode("utf-8", "replace")}``; result.stderr, ``{result.stderr.decode("utf-8", "replace")}``' )
         if result.returncode == 0:
             success_check = True
             log.debug( f'success posting mods for pid, ``{pid}``' )
@@ -175,11 +308,33 @@ def save_mods( pid: str, updated_mods: str ) -> bool:
     except:
         log.exception( 'problem updating mods; processing continues' )    
     finally:
-        os.remove( temp_file_path )
+        if temp_file_path:
+            os.remove( temp_file_path )
     log.debug( f'success_check, ``{success_check}``' )
     return success_check
 
 
+def process_pid( pid: str, mods: bytes, tracker: dict, tracker_lock: threading.Lock, PREBUILT_RECORD_INFO_BYTES: bytes ) -> None:
+    """
+    Updates and re-saves the already-fetched mods for a single pid, and updates the tracker.
+    Called by: manage_update(), via a worker-thread.
+    """
+    assert type(pid) == str
+    ## check if element already exists ------------------------------
+    if check_if_element_exists( pid, mods, tracker, tracker_lock ) == True:
+        return
+    ## update xml ---------------------------------------------------
+    updated_mods: bytes = update_local_mods_string( mods, PREBUILT_RECORD_INFO_BYTES )
+    ## save back to BDR ---------------------------------------------
+    success_check: bool = save_mods( pid, updated_mods )
+    ## update tracker -----------------------------------------------
+    if success_check:
+        update_tracker( pid, tracker, 'done', tracker_lock )
+    else:
+        update_tracker( pid, tracker, 'error; see logs', tracker_lock )
+    return
+
+
 ## manager function -------------------------------------------------
 
 
@@ -188,33 +343,49 @@ def manage_update( pid_full_fpath: pathlib.Path ) -> None:
     Manages processing of mods-update.
     Called by: cli_start.py
     """
-    ## get list of pids from file -----------------------------------
-    pids: list = load_pids( pid_full_fpath )
-    # assert len( pids ) == 97
     ## load tracker -------------------------------------------------
     tracker_filepath: pathlib.Path = create_tracker( pid_full_fpath )  # loads tracker if it already exists
+    tracker: dict = load_tracker( tracker_filepath )
     ## build the record-info element --------------------------------
-    PREBUILT_RECORD_INFO_ELEMENT: etree.Element = create_record_info_element()  # type:ignore
-    ## loop over pids -----------------------------------------------
-    for pid in pids:
-        assert type(pid) == str
-        ## check if pid has been processed --------------------------
-        if check_if_pid_was_processed( pid, tracker_filepath ) != 'not_done':  # the default-initialization-status
-            continue
-        ## get mods -------------------------------------------------
-        mods: str = get_mods( pid )
-        ## check if element already exists --------------------------
-        if check_if_element_exists( pid, mods, tracker_filepath ) == True:
-            continue
-        ## update xml -----------------------------------------------
-        updated_mods: str = update_local_mods_string( mods, PREBUILT_RECORD_INFO_ELEMENT )
-        ## save back to BDR -----------------------------------------
-        success_check: bool = save_mods( pid, updated_mods )
-        ## update tracker -------------------------------------------
-        if success_check:
-            update_tracker( pid, tracker_filepath, 'done' )
-        else:
-            update_tracker( pid, tracker_filepath, 'error; see logs' )
+    PREBUILT_RECORD_INFO_BYTES: bytes = create_record_info_element()
+    ## determine unprocessed pids from file ------------------------
+    pids_to_process: list = list( dict.fromkeys(  # de-duplicates, keeping file-order, so each pid is fetched once
+        pid for pid in iter_pids( pid_full_fpath ) if tracker.get( pid, 'not_done' ) == 'not_done' ) )  # the default-initialization-status
+    log.debug( f'number of pids to process, ``{len(pids_to_process)}``' )
+    tracker_lock = threading.Lock()
+    try:
+        ## fetch all mods concurrently ------------------------------
+        fetched: dict = asyncio.run( fetch_all_mods(pids_to_process) )
+        ## update and save mods concurrently ------------------------
+        with ThreadPoolExecutor( max_workers=MAX_WORKERS ) as executor:
+            futures: dict = {}
+            try:
+                for pid, mods in fetched.items():
+                    if isinstance( mods, BaseException ):
+                        log.error( f'problem getting mods for pid, ``{pid}``; processing continues', exc_info=mods )
+                        update_tracker( pid, tracker, 'error; see logs', tracker_lock )
+                        continue
+                    futures[executor.submit( process_pid, pid, mods, tracker, tracker_lock, PREBUILT_RECORD_INFO_BYTES )] = pid
+                for i, future in enumerate( as_completed(futures), start=1 ):
+                    pid: str = futures[future]
+                    try:
+                        future.result()
+                    except:
+                        log.exception( f'problem processing pid, ``{pid}``; processing continues' )
+                        update_tracker( pid, tracker, 'error; see logs', tracker_lock )
+                    ## periodically save tracker, so a crash loses little --
+                    if i % TRACKER_FLUSH_INTERVAL == 0:
+                        with tracker_lock:
+                            flush_tracker( tracker, tracker_filepath )
+            except BaseException:
+                ## on ctrl-c (or any error here), cancel queued pids, so they're not posted while the executor shuts down
+                ## (`shutdown(cancel_futures=True)` requires python 3.9+)
+                for future in futures:
+                    future.cancel()
+                raise
+    finally:
+        with tracker_lock:
+            flush_tracker( tracker, tracker_filepath )
     return
 
 